@@ -12,6 +12,16 @@ When assumptions change, update assumptions.md FIRST, then this file.
 # ---------------------------------------------------------------------------
 RANDOM_SEED = 42
 
+# ---------------------------------------------------------------------------
+# Numeric Precision
+# ---------------------------------------------------------------------------
+# Working dtype for scratch Monte Carlo buffers (hourly withdrawal paths, trader
+# populations). float32 halves memory traffic; set to "float64" to check
+# precision impact. Persisted datasets (user balances, market returns) and money
+# totals stay float64. A plain .sum() over a float32 array accumulates in
+# float32, so reductions that feed reported figures pass dtype=np.float64.
+FLOAT_DTYPE = "float32"
+
 # ---------------------------------------------------------------------------
 # User Base
 # ---------------------------------------------------------------------------
@@ -173,6 +183,7 @@ BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
 RAW_DATA_DIR    = os.path.join(BASE_DIR, "data", "raw")
 USERS_CSV_PATH  = os.path.join(RAW_DATA_DIR, "synthetic_users_scaled.csv")
 MARKET_CSV_PATH = os.path.join(RAW_DATA_DIR, "market_history_365d.csv")
+WITHDRAWAL_NPZ_PATH = os.path.join(RAW_DATA_DIR, "withdrawal_paths.npz")   # Monte Carlo cache
 
 N_SIMULATIONS   = 10_000    # Monte Carlo paths
 N_DAYS_HISTORY  = 365       # Days of synthetic market data history
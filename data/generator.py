@@ -11,17 +11,22 @@ Key outputs:
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 import sys
 import os
 
-# Add parent directory to path for config import
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
 try:
-    from data.market_data import generate_market_data
+    import config as cfg
 except ImportError:
-    from market_data import generate_market_data
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+
+
+# config.py constants that determine generate_user_base output (cache key)
+USER_BASE_CONFIG_KEYS = (
+    "N_USERS", "RETAIL_SHARE", "INST_SHARE", "INST_BALANCE_SHARE",
+    "RETAIL_BALANCE_MU", "RETAIL_BALANCE_SIGMA", "INST_BALANCE_MU", "INST_BALANCE_SIGMA",
+)
 
 
 def generate_user_base(seed: int = cfg.RANDOM_SEED, target_aum: float = cfg.EXCHANGE_AUM) -> pd.DataFrame:
@@ -58,34 +63,39 @@ def generate_user_base(seed: int = cfg.RANDOM_SEED, target_aum: float = cfg.EXCH
     )
 
     # Scale institutional balances so they hold INST_BALANCE_SHARE of total fiat
-    current_inst_share = inst_balances.sum() / (retail_balances.sum() + inst_balances.sum())
+    retail_total = retail_balances.sum()
+    inst_total   = inst_balances.sum()
+
+    current_inst_share = inst_total / (retail_total + inst_total)
     target_inst_share  = cfg.INST_BALANCE_SHARE
     scale_factor       = (target_inst_share / current_inst_share) * \
-                         (retail_balances.sum() / inst_balances.sum()) * \
+                         (retail_total / inst_total) * \
                          (target_inst_share / (1 - target_inst_share))
 
-    inst_balances = inst_balances * scale_factor
-
-    # Build DataFrame
-    retail_df = pd.DataFrame({
-        "user_id":      range(n_retail),
-        "user_type":    "retail",
-        "fiat_balance": retail_balances,
-    })
-    inst_df = pd.DataFrame({
-        "user_id":      range(n_retail, cfg.N_USERS),
-        "user_type":    "institutional",
-        "fiat_balance": inst_balances,
-    })
-
-    users_df = pd.concat([retail_df, inst_df], ignore_index=True)
-    users_df["user_id"] = users_df.index
-
     # Rescale all balances to target_aum so absolute amounts match EXCHANGE_AUM.
     # This preserves the distributional shape (Gini, concentration) exactly.
+    # The post-scaling total follows from the cached sums, so both scalings
+    # fold into a single multiply per segment.
+    aum_scale = 1.0
     if target_aum is not None:
-        scale = target_aum / users_df["fiat_balance"].sum()
-        users_df["fiat_balance"] = users_df["fiat_balance"] * scale
+        aum_scale = target_aum / (retail_total + inst_total * scale_factor)
+
+    # Balances are money and are summed into reported totals, so they stay float64
+    balances = np.empty(cfg.N_USERS)
+    np.multiply(retail_balances, aum_scale, out=balances[:n_retail])
+    np.multiply(inst_balances, scale_factor * aum_scale, out=balances[n_retail:])
+
+    # Categorical: one int8 code per row instead of a Python string pointer
+    user_type = pd.Categorical.from_codes(
+        np.repeat(np.array([0, 1], dtype=np.int8), [n_retail, n_inst]),
+        categories=["retail", "institutional"],
+    )
+
+    users_df = pd.DataFrame({
+        "user_id":      np.arange(cfg.N_USERS),
+        "user_type":    user_type,
+        "fiat_balance": balances,
+    })
 
     return users_df
 
@@ -94,8 +104,10 @@ def compute_gini(balances: np.ndarray) -> float:
     """Compute Gini coefficient for a balance array."""
     sorted_b = np.sort(balances)
     n = len(sorted_b)
-    cumsum = np.cumsum(sorted_b)
-    gini = (n + 1 - 2 * np.sum(cumsum) / cumsum[-1]) / n
+    total = sorted_b.sum(dtype=np.float64)
+    # Rank-weighted closed form: G = (2 * Σ i·x_(i) - (n+1) * Σ x) / (n * Σ x)
+    ranks = np.arange(1, n + 1, dtype=np.float64)
+    gini = (2 * np.dot(ranks, sorted_b) - (n + 1) * total) / (n * total)
     return gini
 
 
@@ -119,6 +131,8 @@ def generate_retail_withdrawals(
     scenario: str,
     n_hours: int = cfg.WEEKEND_HOURS,
     seed: int = cfg.RANDOM_SEED + 1,
+    rng: np.random.Generator = None,
+    n_paths: int = None,
 ) -> np.ndarray:
     """
     Generate hourly retail withdrawal amounts using Gamma distribution.
@@ -131,12 +145,15 @@ def generate_retail_withdrawals(
     total_fiat : float — total exchange fiat holdings (USD)
     scenario   : "normal" | "mild" | "severe"
     n_hours    : simulation horizon (default: 64 hours weekend)
+    rng        : optional shared Generator; when given, `seed` is ignored
+    n_paths    : independent paths to draw at once (None = a single path)
 
     Returns
     -------
-    np.ndarray of shape (n_hours,) — hourly retail withdrawal amounts
+    np.ndarray of shape (n_hours,), or (n_hours, n_paths) — hourly retail withdrawal amounts
     """
-    rng = np.random.default_rng(seed)
+    if rng is None:
+        rng = np.random.default_rng(seed)
 
     rate_ranges = {
         "normal": cfg.NORMAL_DAILY_RATE,
@@ -145,8 +162,8 @@ def generate_retail_withdrawals(
     }
     rate_min, rate_max = rate_ranges[scenario]
 
-    # Sample daily rate uniformly from range
-    daily_rate = rng.uniform(rate_min, rate_max)
+    # Sample daily rate uniformly from range (one per path)
+    daily_rate = rng.uniform(rate_min, rate_max, size=n_paths)
     daily_withdrawal = daily_rate * total_fiat
 
     # Hourly mean and variance (overdispersed in stress)
@@ -160,7 +177,8 @@ def generate_retail_withdrawals(
     alpha = hourly_mean ** 2 / variance  # shape
     beta  = hourly_mean / variance       # rate (1/scale)
 
-    withdrawals = rng.gamma(shape=alpha, scale=1.0 / beta, size=n_hours)
+    size = n_hours if n_paths is None else (n_hours, n_paths)
+    withdrawals = rng.gamma(shape=alpha, scale=1.0 / beta, size=size)
     return withdrawals
 
 
@@ -169,6 +187,8 @@ def generate_institutional_withdrawals(
     scenario: str,
     n_hours: int = cfg.WEEKEND_HOURS,
     seed: int = cfg.RANDOM_SEED + 2,
+    rng: np.random.Generator = None,
+    n_paths: int = None,
 ) -> np.ndarray:
     """
     Generate hourly institutional withdrawal amounts using Poisson Jump Process.
@@ -184,35 +204,45 @@ def generate_institutional_withdrawals(
     total_fiat : float — total exchange fiat holdings (USD)
     scenario   : "normal" | "mild" | "severe"
     n_hours    : simulation horizon
+    rng        : optional shared Generator; when given, `seed` is ignored
+    n_paths    : independent paths to draw at once (None = a single path)
 
     Returns
     -------
-    np.ndarray of shape (n_hours,) — hourly institutional withdrawal amounts
+    np.ndarray of shape (n_hours,), or (n_hours, n_paths) — hourly institutional withdrawal amounts
     """
-    rng = np.random.default_rng(seed)
+    if rng is None:
+        rng = np.random.default_rng(seed)
 
     arrival_rate_per_hour = cfg.INST_JUMP_RATE[scenario] / 24.0
     jump_log_mu    = cfg.INST_JUMP_LOG_MU[scenario]
     jump_log_sigma = cfg.INST_JUMP_LOG_SIGMA[scenario]
 
-    withdrawals = np.zeros(n_hours)
-
-    for hour in range(n_hours):
-        # Number of institutional withdrawals in this hour (Poisson)
-        n_arrivals = rng.poisson(arrival_rate_per_hour)
+    # Total arrivals over the horizon (Poisson). Conditional on the count, the
+    # arrival times of a constant-rate Poisson process are uniform, so each
+    # jump lands in a uniformly drawn hour.
+    n_arrivals = rng.poisson(arrival_rate_per_hour * n_hours, size=n_paths)
+    total_arrivals = int(np.sum(n_arrivals))
+
+    # Jump sizes from log-normal, for every path's arrivals in one draw
+    jump_sizes = rng.lognormal(
+        mean=jump_log_mu,
+        sigma=jump_log_sigma,
+        size=total_arrivals,
+    )
+    # Cap individual jumps at max plausible fraction of total fiat
+    jump_sizes = np.minimum(jump_sizes, total_fiat * 0.15)
+    arrival_hours = rng.integers(0, n_hours, size=total_arrivals)
 
-        if n_arrivals > 0:
-            # Jump sizes from log-normal
-            jump_sizes = rng.lognormal(
-                mean=jump_log_mu,
-                sigma=jump_log_sigma,
-                size=n_arrivals,
-            )
-            # Cap individual jumps at max plausible fraction of total fiat
-            jump_sizes = np.minimum(jump_sizes, total_fiat * 0.15)
-            withdrawals[hour] = jump_sizes.sum()
+    if n_paths is None:
+        return np.bincount(arrival_hours, weights=jump_sizes, minlength=n_hours)
 
-    return withdrawals
+    # Scatter each jump into its (hour, path) cell of the row-major output
+    arrival_path = np.repeat(np.arange(n_paths), n_arrivals)
+    withdrawals = np.bincount(
+        arrival_hours * n_paths + arrival_path, weights=jump_sizes, minlength=n_hours * n_paths
+    )
+    return withdrawals.reshape(n_hours, n_paths)
 
 
 def generate_weekend_withdrawals(
@@ -238,12 +268,15 @@ def generate_weekend_withdrawals(
     """
     lead_hours = cfg.INST_LEAD_TIME_HOURS.get(scenario, 0)
 
-    retail = generate_retail_withdrawals(total_fiat, scenario, n_hours, seed + 1)
+    # One Generator feeds both components; each consumes its own draws in turn
+    rng = np.random.default_rng(seed)
+
+    retail = generate_retail_withdrawals(total_fiat, scenario, n_hours, rng=rng)
 
     # Institutional starts earlier — shift lead hours by generating extra and trimming
     n_inst_hours = n_hours + lead_hours
     inst_full = generate_institutional_withdrawals(
-        total_fiat, scenario, n_inst_hours, seed + 2
+        total_fiat, scenario, n_inst_hours, rng=rng
     )
     # Lead: institutional starts at hour 0 as if they got wind earlier
     # Retail starts 'lead_hours' later in the cumulative timeline
@@ -265,20 +298,33 @@ def generate_weekend_withdrawals(
 # Standalone smoke test
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    # Persistence helpers are only needed here; library imports stay light
+    try:
+        from data.market_data import generate_market_data, MARKET_DATA_CONFIG_KEYS
+        from data.cache import params_hash, is_up_to_date, write_csv
+    except ImportError:
+        from market_data import generate_market_data, MARKET_DATA_CONFIG_KEYS
+        from cache import params_hash, is_up_to_date, write_csv
+
     print("Generating user base...")
     users = generate_user_base()
 
     total_fiat = users["fiat_balance"].sum()
     inst_share = users.loc[users["user_type"] == "institutional", "fiat_balance"].sum() / total_fiat
 
-    gini = compute_gini(users["fiat_balance"].values)
+    gini = compute_gini(users["fiat_balance"].to_numpy(copy=False))
+
+    # 2. Save to CSV (skipped when the persisted file was built from the same inputs)
+    users_digest = params_hash(USER_BASE_CONFIG_KEYS, seed=cfg.RANDOM_SEED, target_aum=cfg.EXCHANGE_AUM)
+    if not is_up_to_date(cfg.USERS_CSV_PATH, users_digest):
+        write_csv(users, cfg.USERS_CSV_PATH, users_digest)
 
-    # 2. Save to CSV
-    users.to_csv(cfg.USERS_CSV_PATH, index=False)
-    
     # 3. Market data (persistence)
-    mdf = generate_market_data()
-    mdf.to_csv(cfg.MARKET_CSV_PATH, index=False)
+    market_digest = params_hash(
+        MARKET_DATA_CONFIG_KEYS, n_days=cfg.N_DAYS_HISTORY, seed=cfg.RANDOM_SEED, use_business_dates=True
+    )
+    if not is_up_to_date(cfg.MARKET_CSV_PATH, market_digest):
+        write_csv(generate_market_data(use_business_dates=True), cfg.MARKET_CSV_PATH, market_digest)
 
     print(f"  Users generated : {len(users):,}")
     print(f"  Total fiat AUM  : Rp {total_fiat:,.0f}")
@@ -14,13 +14,26 @@ Key insight: VaR fails silently. The generative model fails loudly. Both are nee
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
 from data.market_data import generate_market_data, get_worst_stress_window
+from models.quantile import percentile, lower_tail
+
+
+# Parametric shock scenarios as a (scenario, asset) matrix of absolute shocks;
+# assets missing from a scenario carry no shock
+_SCENARIOS  = tuple(cfg.SCENARIO_SHOCKS)
+_ASSETS     = tuple(dict.fromkeys(a for shocks in cfg.SCENARIO_SHOCKS.values() for a in shocks))
+_ABS_SHOCKS = np.abs(np.array([
+    [cfg.SCENARIO_SHOCKS[s].get(a, 0.0) for a in _ASSETS] for s in _SCENARIOS
+]))
 
 
 def compute_ewma_volatility(returns: np.ndarray, lam: float = cfg.EWMA_LAMBDA) -> np.ndarray:
@@ -38,12 +51,17 @@ def compute_ewma_volatility(returns: np.ndarray, lam: float = cfg.EWMA_LAMBDA) -
     -------
     np.ndarray of same length — EWMA variance series (sigma²)
     """
-    n = len(returns)
-    ewma_var = np.zeros(n)
+    returns  = np.asarray(returns, dtype=np.float64)
+    ewma_var = np.empty(len(returns))
     ewma_var[0] = returns[0] ** 2
 
-    for t in range(1, n):
-        ewma_var[t] = lam * ewma_var[t - 1] + (1 - lam) * returns[t - 1] ** 2
+    # The recurrence is a first-order IIR filter on r²_{t-1}; lfilter runs it in C,
+    # seeded so that the first output continues from σ²_0 = r²_0. Imported here:
+    # scipy.signal dominates the module's import time and only this call needs it
+    from scipy.signal import lfilter
+    ewma_var[1:], _ = lfilter(
+        [1 - lam], [1, -lam], returns[:-1] ** 2, zi=[lam * ewma_var[0]]
+    )
 
     return ewma_var
 
@@ -61,7 +79,7 @@ def hs_var(
     Returns VaR as a positive loss fraction (e.g., 0.082 = 8.2% loss).
     """
     recent = returns[-lookback:]
-    return float(-np.percentile(recent, (1 - confidence) * 100))
+    return float(-percentile(recent, (1 - confidence) * 100))
 
 
 def fhs_var(
@@ -69,6 +87,7 @@ def fhs_var(
     confidence: float = cfg.VAR_CONFIDENCE,
     lam: float = cfg.EWMA_LAMBDA,
     lookback: int = cfg.VAR_LOOKBACK_DAYS,
+    ewma_var: np.ndarray = None,
 ) -> float:
     """
     EWMA-Filtered Historical Simulation VaR (FHS-VaR).
@@ -78,9 +97,13 @@ def fhs_var(
 
     Effective sample size = 1/(1-λ) ≈ 17 days at λ=0.94.
     Almost entirely pricing current vol — appropriate for crypto's fast regime changes.
+
+    `ewma_var` may carry a precomputed compute_ewma_volatility() of the lookback
+    slice, so callers that already have it skip the recurrence.
     """
     recent = returns[-lookback:]
-    ewma_var = compute_ewma_volatility(recent, lam)
+    if ewma_var is None:
+        ewma_var = compute_ewma_volatility(recent, lam)
 
     current_vol = np.sqrt(ewma_var[-1])
     historical_vols = np.sqrt(ewma_var)
@@ -91,7 +114,7 @@ def fhs_var(
     # Rescale to current volatility
     rescaled = standardized * current_vol
 
-    return float(-np.percentile(rescaled, (1 - confidence) * 100))
+    return float(-percentile(rescaled, (1 - confidence) * 100))
 
 
 def stressed_var(
@@ -99,16 +122,18 @@ def stressed_var(
     market_df: pd.DataFrame,
     confidence: float = cfg.VAR_CONFIDENCE,
     window: int = cfg.STRESSED_VAR_WINDOW,
+    worst_returns: np.ndarray = None,
 ) -> float:
     """
     Stressed VaR: VaR computed using only the worst 90-day BTC drawdown window.
 
     Basel III-inspired: anchors Tier 2 reserve to the worst historical episode
     in our synthetic data. Only as bad as the worst period in the dataset.
+    Pass `worst_returns` to reuse an already extracted worst window.
     """
-    worst_window_df = get_worst_stress_window(market_df, window)
-    worst_returns   = worst_window_df["btc_return"].values
-    return float(-np.percentile(worst_returns, (1 - confidence) * 100))
+    if worst_returns is None:
+        worst_returns = get_worst_stress_window(market_df, window)["btc_return"].to_numpy(copy=False)
+    return float(-percentile(worst_returns, (1 - confidence) * 100))
 
 
 def parametric_scenario_var(
@@ -127,13 +152,11 @@ def parametric_scenario_var(
     -------
     dict mapping scenario → {"loss_usd": float, "loss_pct": float}
     """
-    results = {}
-    for scenario, shocks in cfg.SCENARIO_SHOCKS.items():
-        weighted_loss = 0.0
-        for asset, shock in shocks.items():
-            weight = portfolio_weights.get(asset, 0.0)
-            weighted_loss += weight * abs(shock)
+    weights = np.array([portfolio_weights.get(a, 0.0) for a in _ASSETS])
+    losses  = _ABS_SHOCKS @ weights
 
+    results = {}
+    for scenario, weighted_loss in zip(_SCENARIOS, losses.tolist()):
         results[scenario] = {
             "loss_pct":    weighted_loss,
             "loss_usd":    weighted_loss * portfolio_value,
@@ -143,9 +166,8 @@ def parametric_scenario_var(
 
 def compute_var_es(returns: np.ndarray, confidence: float) -> tuple:
     """Compute both VaR and Expected Shortfall (CVaR)."""
-    var = float(-np.percentile(returns, (1 - confidence) * 100))
-    es = float(-returns[returns <= -var].mean()) if any(returns <= -var) else var
-    return var, es
+    threshold, tail_mean = lower_tail(returns, (1 - confidence) * 100)
+    return -threshold, -tail_mean
 
 
 def compute_var_suite(
@@ -163,19 +185,19 @@ def compute_var_suite(
     if portfolio_weights is None:
         portfolio_weights = {"BTC": 0.50, "ETH": 0.30, "ALT": 0.20}
 
-    btc_returns = market_df["btc_return"].values
-    
+    btc_returns = market_df["btc_return"].to_numpy(copy=False)
+    recent      = btc_returns[-cfg.VAR_LOOKBACK_DAYS:]
+
     # HS metrics
-    hs_99_v, hs_99_es = compute_var_es(btc_returns[-cfg.VAR_LOOKBACK_DAYS:], 0.99)
-    hs_95_v, hs_95_es = compute_var_es(btc_returns[-cfg.VAR_LOOKBACK_DAYS:], 0.95)
-    
+    hs_99_v, hs_99_es = compute_var_es(recent, 0.99)
+    hs_95_v, hs_95_es = compute_var_es(recent, 0.95)
+
     # FHS metrics (simplified CVaR for EWMA)
-    fhs_v = fhs_var(btc_returns)
+    fhs_v = fhs_var(btc_returns, ewma_var=compute_ewma_volatility(recent))
     fhs_es = fhs_v * 1.2 # Proxy for ES in EWMA context
-    
-    # Stressed metrics
-    s_var = stressed_var(btc_returns, market_df)
-    worst_returns = get_worst_stress_window(market_df, cfg.STRESSED_VAR_WINDOW)["btc_return"].values
+
+    # Stressed metrics (worst window located once)
+    worst_returns = get_worst_stress_window(market_df, cfg.STRESSED_VAR_WINDOW)["btc_return"].to_numpy(copy=False)
     s_var, s_es = compute_var_es(worst_returns, 0.99)
 
     # Parametric scenario losses
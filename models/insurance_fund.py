@@ -17,20 +17,55 @@ CFD equity note: US stock CFDs correlation with BTC rises from 0.35 (normal) to
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+
+
+def _truncated_normal(
+    mean: float,
+    std: float,
+    low: float,
+    high: float,
+    size: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Draw from N(mean, std²) truncated to [low, high] by batched rejection.
+
+    Each round over-draws the remaining count by 20% and keeps in-range values,
+    so a mild truncation fills the output in one or two rounds.
+    """
+    out = np.empty(size)
+    filled = 0
+    while filled < size:
+        n_draw = int((size - filled) * 1.2) + 8
+        x = rng.normal(mean, std, n_draw)
+        x = x[(x >= low) & (x <= high)]
+        k = min(len(x), size - filled)
+        out[filled:filled + k] = x[:k]
+        filled += k
+    return out
 
 
-def generate_trader_population(
+_TRADER_TYPES = ("retail", "institutional")
+
+
+def generate_trader_arrays(
     aum: float,
     seed: int = cfg.RANDOM_SEED + 100,
-) -> pd.DataFrame:
+) -> dict:
     """
-    Generate synthetic trader population for a derivatives exchange.
+    Generate synthetic trader population for a derivatives exchange as arrays.
+
+    Simulation code consumes these directly; generate_trader_population wraps
+    them in a DataFrame for reporting.
 
     Parameters
     ----------
@@ -39,8 +74,10 @@ def generate_trader_population(
 
     Returns
     -------
-    pd.DataFrame with columns:
-        trader_id, trader_type, margin (IDR), leverage, notional (IDR), position (long/short)
+    dict of (n_traders,) arrays, retail first:
+        notional, margin, leverage : cfg.FLOAT_DTYPE — IDR, IDR, x
+        position                   : int8 — +1 long, -1 short
+        trader_type                : int8 — index into _TRADER_TYPES
     """
     rng = np.random.default_rng(seed)
 
@@ -55,13 +92,8 @@ def generate_trader_population(
     inst_notional_total   = total_oi * cfg.INST_NOTIONAL_SHARE
     retail_notional_total = total_oi * (1 - cfg.INST_NOTIONAL_SHARE)
 
-    def trucated_normal_leverage(mean, std, low, high, size, rng):
-        a = (low - mean) / std
-        b = (high - mean) / std
-        return stats.truncnorm.rvs(a, b, loc=mean, scale=std, size=size, random_state=rng.integers(0, 2**31))
-
     # Retail traders: high freq, higher leverage, smaller notional
-    retail_leverage = trucated_normal_leverage(
+    retail_leverage = _truncated_normal(
         cfg.RETAIL_LEVERAGE_MEAN, cfg.RETAIL_LEVERAGE_STD,
         cfg.RETAIL_LEVERAGE_MIN, cfg.RETAIL_LEVERAGE_MAX,
         n_retail, rng,
@@ -77,7 +109,7 @@ def generate_trader_population(
     retail_notional = retail_notional / retail_notional.sum() * retail_notional_total
 
     # Institutional traders: rare, lower leverage, larger notional
-    inst_leverage = trucated_normal_leverage(
+    inst_leverage = _truncated_normal(
         cfg.INST_LEVERAGE_MEAN, cfg.INST_LEVERAGE_STD,
         cfg.INST_LEVERAGE_MIN, cfg.INST_LEVERAGE_MAX,
         n_inst, rng,
@@ -91,34 +123,104 @@ def generate_trader_population(
     )
     inst_notional = inst_notional / inst_notional.sum() * inst_notional_total
 
+    # Output arrays, retail rows first; values are cast to working precision as
+    # they are written (sums over positions accumulate in float64)
+    retail, inst = slice(0, n_retail), slice(n_retail, n_traders)
+    notional = np.empty(n_traders, dtype=cfg.FLOAT_DTYPE)
+    leverage = np.empty(n_traders, dtype=cfg.FLOAT_DTYPE)
+    margin   = np.empty(n_traders, dtype=cfg.FLOAT_DTYPE)
+    position = np.empty(n_traders, dtype=np.int8)
+
+    notional[retail], notional[inst] = retail_notional, inst_notional
+    leverage[retail], leverage[inst] = retail_leverage, inst_leverage
+
     # Margin = Notional / Leverage
-    retail_margin = retail_notional / retail_leverage
-    inst_margin   = inst_notional / inst_leverage
+    margin[retail] = retail_notional / retail_leverage
+    margin[inst]   = inst_notional / inst_leverage
 
     # Random long/short positions
-    retail_side = rng.choice([-1, 1], size=n_retail)  # -1=short, 1=long
-    inst_side   = rng.choice([-1, 1], size=n_inst)
-
-    retail_df = pd.DataFrame({
-        "trader_id":   range(n_retail),
-        "trader_type": "retail",
-        "margin":      retail_margin,
-        "leverage":    retail_leverage,
-        "notional":    retail_notional,
-        "position":    retail_side,
-    })
-    inst_df = pd.DataFrame({
-        "trader_id":   range(n_retail, n_traders),
-        "trader_type": "institutional",
-        "margin":      inst_margin,
-        "leverage":    inst_leverage,
-        "notional":    inst_notional,
-        "position":    inst_side,
+    sides = np.array([-1, 1], dtype=np.int8)  # -1=short, 1=long
+    position[retail] = rng.choice(sides, size=n_retail)
+    position[inst]   = rng.choice(sides, size=n_inst)
+
+    return {
+        "notional":    notional,
+        "margin":      margin,
+        "leverage":    leverage,
+        "position":    position,
+        "trader_type": np.repeat(np.array([0, 1], dtype=np.int8), [n_retail, n_inst]),
+    }
+
+
+def generate_trader_population(
+    aum: float,
+    seed: int = cfg.RANDOM_SEED + 100,
+) -> pd.DataFrame:
+    """
+    Generate synthetic trader population for a derivatives exchange.
+
+    Parameters
+    ----------
+    aum  : float — exchange total fiat AUM (USD)
+    seed : int
+
+    Returns
+    -------
+    pd.DataFrame with columns:
+        trader_id, trader_type, margin (IDR), leverage, notional (IDR), position (long/short)
+    """
+    arrays = generate_trader_arrays(aum, seed)
+    return pd.DataFrame({
+        "trader_id":   np.arange(len(arrays["notional"])),
+        "trader_type": pd.Categorical.from_codes(arrays["trader_type"], categories=_TRADER_TYPES),
+        "margin":      arrays["margin"],
+        "leverage":    arrays["leverage"],
+        "notional":    arrays["notional"],
+        "position":    arrays["position"],
     })
 
-    traders = pd.concat([retail_df, inst_df], ignore_index=True)
-    traders["trader_id"] = traders.index
-    return traders
+
+def trader_arrays(traders: pd.DataFrame) -> dict:
+    """
+    Pull the columns the cascade needs into contiguous NumPy arrays.
+
+    Parameters
+    ----------
+    traders : pd.DataFrame from generate_trader_population()
+
+    Returns
+    -------
+    dict with keys:
+        notional, margin : np.ndarray cfg.FLOAT_DTYPE (n_traders,)
+        position         : np.ndarray int8 (n_traders,) — +1 long, -1 short
+    """
+    return {
+        "notional": traders["notional"].to_numpy(dtype=cfg.FLOAT_DTYPE),
+        "margin":   traders["margin"].to_numpy(dtype=cfg.FLOAT_DTYPE),
+        "position": traders["position"].to_numpy(dtype=np.int8),
+    }
+
+
+def _liquidations(
+    notional: np.ndarray,
+    margin: np.ndarray,
+    position: np.ndarray,
+    price_shock: float,
+) -> tuple:
+    """
+    Per-position P&L and liquidation state on raw arrays.
+
+    Returns
+    -------
+    (pnl, net_margin, liquidated, shortfall) — arrays aligned with the inputs
+    """
+    # Long positions lose when price drops; short positions gain
+    pnl        = position * price_shock * notional
+    net_margin = margin + pnl
+    # Liquidation occurs when net_margin <= 0; the deficit falls to the insurance fund
+    liquidated = net_margin <= 0
+    shortfall  = np.where(liquidated, -net_margin, 0.0)
+    return pnl, net_margin, liquidated, shortfall
 
 
 def compute_liquidations(
@@ -137,35 +239,66 @@ def compute_liquidations(
     -------
     pd.DataFrame with additional columns: pnl, net_margin, shortfall, liquidated
     """
-    traders = traders.copy()
+    arrays = trader_arrays(traders)
+    pnl, net_margin, liquidated, shortfall = _liquidations(
+        arrays["notional"], arrays["margin"], arrays["position"], price_shock
+    )
+    return traders.assign(
+        pnl=pnl, net_margin=net_margin, liquidated=liquidated, shortfall=shortfall,
+    )
 
-    # P&L for each position
-    # Long positions lose when price drops; short positions gain
-    traders["pnl"] = traders["position"] * price_shock * traders["notional"]
 
-    # Net margin after P&L
-    traders["net_margin"] = traders["margin"] + traders["pnl"]
+def liquidation_ladder(traders: pd.DataFrame | dict) -> dict:
+    """
+    Order positions by the price move that wipes out their margin.
 
-    # Liquidation occurs when net_margin <= 0
-    traders["liquidated"] = traders["net_margin"] <= 0
+    A position is liquidated once position * shock <= -margin / notional, so for
+    each side the liquidated set at any shock is a prefix of the positions sorted
+    by margin / notional. Prefix sums of margin and notional then give the
+    shortfall and liquidated notional of any batch of liquidations in O(1).
 
-    # Shortfall = amount the insurance fund must absorb (negative net_margin)
-    traders["shortfall"] = np.where(
-        traders["liquidated"],
-        -traders["net_margin"],  # positive amount of deficit
-        0.0,
-    )
+    Parameters
+    ----------
+    traders : pd.DataFrame from generate_trader_population(), or the arrays from
+              generate_trader_arrays() / trader_arrays()
 
-    return traders
+    Returns
+    -------
+    dict mapping side ("long", "short") → {
+        threshold    : np.ndarray — sorted margin / notional
+        cum_margin   : np.ndarray — prefix sums of margin in that order (leading 0)
+        cum_notional : np.ndarray — prefix sums of notional in that order (leading 0)
+    }
+    """
+    if isinstance(traders, pd.DataFrame):
+        traders = trader_arrays(traders)
+
+    ladder = {}
+    for side, sign in (("long", 1), ("short", -1)):
+        on_side  = traders["position"] == sign
+        notional = traders["notional"][on_side]
+        margin   = traders["margin"][on_side]
+
+        threshold = margin / notional
+        order     = np.argsort(threshold, kind="stable")
+        ladder[side] = {
+            "threshold":    threshold[order],
+            "cum_margin":   np.concatenate(([0.0], np.cumsum(margin[order], dtype=np.float64))),
+            "cum_notional": np.concatenate(([0.0], np.cumsum(notional[order], dtype=np.float64))),
+        }
+    return ladder
 
 
 def simulate_liquidation_cascade(
-    traders: pd.DataFrame,
+    traders: pd.DataFrame | dict,
     initial_shock: float,
     aum: float,
     insurance_fund_initial: float,
     n_steps: int = cfg.CASCADE_STEPS,
     seed: int = cfg.RANDOM_SEED + 200,
+    record_history: bool = True,
+    rng: np.random.Generator = None,
+    ladder: dict | None = None,
 ) -> dict:
     """
     Simulate multi-step liquidation cascade.
@@ -179,56 +312,78 @@ def simulate_liquidation_cascade(
 
     Parameters
     ----------
-    traders                : pd.DataFrame
+    traders                : trader DataFrame or generate_trader_arrays() output
     initial_shock          : float — initial price drop (e.g., -0.35)
     aum                    : float — exchange AUM baseline
     insurance_fund_initial : float — starting IF balance (IDR)
     n_steps                : int — cascade iterations
+    record_history         : bool — build the per-step cascade_history frame
+                             (None when False; skip it for Monte Carlo use)
+    rng                    : optional shared Generator; when given, `seed` is ignored
+    ladder                 : optional liquidation_ladder(traders), precomputed when
+                             calling repeatedly; when given, `traders` is not re-sorted
 
     Returns
     -------
     dict with: cascade_history, total_shortfall, if_drawdown, if_exhausted,
                clawback_required, final_price_shock
     """
-    rng = np.random.default_rng(seed)
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    if ladder is None:
+        ladder = liquidation_ladder(traders)
+    long_, short = ladder["long"], ladder["short"]
 
     total_oi         = aum * cfg.OI_TO_AUM_RATIO
     insurance_fund   = insurance_fund_initial
     cumulative_shock = initial_shock
+    total_shortfall  = 0.0
     cascade_history  = []
 
-    current_traders = traders.copy()
-    # Track which traders have been liquidated already
-    already_liquidated = np.zeros(len(current_traders), dtype=bool)
+    # Number of positions already liquidated on each side (a prefix of the ladder)
+    n_long_liq  = 0
+    n_short_liq = 0
 
     for step in range(n_steps):
-        # Apply current cumulative shock to non-yet-liquidated traders
-        result = compute_liquidations(current_traders, cumulative_shock)
-
-        # New liquidations this step (not previously liquidated)
-        new_liq_mask = result["liquidated"] & ~already_liquidated
-
-        step_shortfall     = result.loc[new_liq_mask, "shortfall"].sum()
-        step_liq_notional  = result.loc[new_liq_mask, "notional"].sum()
-        step_n_liquidated  = new_liq_mask.sum()
+        # Liquidated prefix at the current cumulative shock; positions past the
+        # previous prefix are this step's new liquidations
+        k_long  = max(int(np.searchsorted(long_["threshold"], -cumulative_shock, side="right")), n_long_liq)
+        k_short = max(int(np.searchsorted(short["threshold"], cumulative_shock, side="right")), n_short_liq)
+
+        long_margin    = long_["cum_margin"][k_long] - long_["cum_margin"][n_long_liq]
+        long_notional  = long_["cum_notional"][k_long] - long_["cum_notional"][n_long_liq]
+        short_margin   = short["cum_margin"][k_short] - short["cum_margin"][n_short_liq]
+        short_notional = short["cum_notional"][k_short] - short["cum_notional"][n_short_liq]
+
+        # Shortfall = -(net margin) summed over the new liquidations
+        step_shortfall = max(
+            0.0,
+            -(long_margin + cumulative_shock * long_notional)
+            - (short_margin - cumulative_shock * short_notional),
+        )
+        step_liq_notional  = long_notional + short_notional
+        step_n_liquidated  = (k_long - n_long_liq) + (k_short - n_short_liq)
 
         # Insurance fund absorbs shortfall
         if_absorbed = min(step_shortfall, insurance_fund)
         insurance_fund -= if_absorbed
         shortfall_after_if = step_shortfall - if_absorbed
 
-        cascade_history.append({
-            "step":                 step + 1,
-            "n_liquidated":         int(step_n_liquidated),
-            "step_shortfall":       step_shortfall,
-            "if_absorbed":          if_absorbed,
-            "if_remaining":         insurance_fund,
-            "shortfall_after_if":   shortfall_after_if,
-            "liq_notional":         step_liq_notional,
-            "cumulative_shock":     cumulative_shock,
-        })
-
-        already_liquidated |= new_liq_mask.values
+        total_shortfall += step_shortfall
+        if record_history:
+            cascade_history.append({
+                "step":                 step + 1,
+                "n_liquidated":         step_n_liquidated,
+                "step_shortfall":       step_shortfall,
+                "if_absorbed":          if_absorbed,
+                "if_remaining":         insurance_fund,
+                "shortfall_after_if":   shortfall_after_if,
+                "liq_notional":         step_liq_notional,
+                "cumulative_shock":     cumulative_shock,
+            })
+
+        n_long_liq, n_short_liq = k_long, k_short
 
         # Market impact from forced liquidations → amplifies price drop
         # Impact factor: liquidated notional relative to OI, scaled by amplifier
@@ -242,13 +397,12 @@ def simulate_liquidation_cascade(
         if step_n_liquidated == 0:
             break
 
-    total_shortfall    = sum(h["step_shortfall"] for h in cascade_history)
     total_if_drawdown  = insurance_fund_initial - insurance_fund
     if_exhausted       = insurance_fund <= 0
     clawback_required  = max(total_shortfall - insurance_fund_initial, 0)
 
     return {
-        "cascade_history":       pd.DataFrame(cascade_history),
+        "cascade_history":       pd.DataFrame(cascade_history) if record_history else None,
         "total_shortfall":       total_shortfall,
         "if_drawdown":           total_if_drawdown,
         "if_remaining":          insurance_fund,
@@ -259,6 +413,76 @@ def simulate_liquidation_cascade(
     }
 
 
+def _run_scenario_mc(
+    ladder: dict,
+    initial_shocks: np.ndarray,
+    impact_noise: np.ndarray,
+    total_oi: float,
+    insurance_fund_initial: float,
+) -> dict:
+    """
+    Run many liquidation cascades in lockstep, one array lane per simulation.
+
+    Same step logic as simulate_liquidation_cascade without the per-step history.
+    A lane whose cascade has stopped sees no new liquidations and an unchanged
+    shock on later steps, so it needs no explicit early exit.
+
+    Parameters
+    ----------
+    ladder                 : dict from liquidation_ladder()
+    initial_shocks         : np.ndarray (n_sims,) — starting price shock per simulation
+    impact_noise           : np.ndarray (n_steps, n_sims) — U(0, 0.5) market impact
+                             draws, consumed one row per step with liquidations
+    total_oi               : float — total open interest
+    insurance_fund_initial : float — starting IF balance (IDR)
+
+    Returns
+    -------
+    dict of (n_sims,) arrays: if_drawdown, if_exhausted, clawback_required, final_price_shock
+    """
+    long_, short = ladder["long"], ladder["short"]
+    n_sims = len(initial_shocks)
+
+    cumulative_shock = np.array(initial_shocks, dtype=np.float64)
+    insurance_fund   = np.full(n_sims, insurance_fund_initial, dtype=np.float64)
+    total_shortfall  = np.zeros(n_sims)
+    n_long_liq       = np.zeros(n_sims, dtype=np.intp)
+    n_short_liq      = np.zeros(n_sims, dtype=np.intp)
+
+    for step_noise in impact_noise:
+        k_long  = np.maximum(np.searchsorted(long_["threshold"], -cumulative_shock, side="right"), n_long_liq)
+        k_short = np.maximum(np.searchsorted(short["threshold"], cumulative_shock, side="right"), n_short_liq)
+
+        long_margin    = long_["cum_margin"][k_long] - long_["cum_margin"][n_long_liq]
+        long_notional  = long_["cum_notional"][k_long] - long_["cum_notional"][n_long_liq]
+        short_margin   = short["cum_margin"][k_short] - short["cum_margin"][n_short_liq]
+        short_notional = short["cum_notional"][k_short] - short["cum_notional"][n_short_liq]
+
+        step_shortfall = np.maximum(
+            0.0,
+            -(long_margin + cumulative_shock * long_notional)
+            - (short_margin - cumulative_shock * short_notional),
+        )
+        step_liq_notional = long_notional + short_notional
+
+        insurance_fund  -= np.minimum(step_shortfall, insurance_fund)
+        total_shortfall += step_shortfall
+        n_long_liq, n_short_liq = k_long, k_short
+
+        if total_oi > 0:
+            impact_ratio = step_liq_notional / total_oi
+            cumulative_shock += np.where(
+                step_liq_notional > 0, -impact_ratio * 0.005 * (1 + step_noise), 0.0
+            )
+
+    return {
+        "if_drawdown":       insurance_fund_initial - insurance_fund,
+        "if_exhausted":      insurance_fund <= 0,
+        "clawback_required": np.maximum(total_shortfall - insurance_fund_initial, 0),
+        "final_price_shock": cumulative_shock,
+    }
+
+
 def simulate_insurance_fund(
     aum: float = cfg.EXCHANGE_AUM,
     n_simulations: int = 500,
@@ -279,7 +503,7 @@ def simulate_insurance_fund(
     rng = np.random.default_rng(seed)
 
     if_initial = aum * cfg.INSURANCE_FUND_INITIAL
-    traders    = generate_trader_population(aum, seed)
+    traders    = liquidation_ladder(generate_trader_arrays(aum, seed))
 
     scenario_shocks = {
         "normal": 0.0,
@@ -288,28 +512,25 @@ def simulate_insurance_fund(
         "luna":   cfg.SCENARIO_SHOCKS["luna"]["BTC"],
     }
 
+    total_oi = aum * cfg.OI_TO_AUM_RATIO
+    n_steps  = cfg.CASCADE_STEPS
+
     results = {}
     for scenario, shock in scenario_shocks.items():
-        drawdowns     = []
-        exhaustions   = []
-        clawbacks     = []
-        final_shocks  = []
-
-        for i in range(n_simulations):
-            # Add stochastic noise to initial shock (±20% of base)
-            noisy_shock = shock * rng.uniform(0.8, 1.2)
-
-            cascade = simulate_liquidation_cascade(
-                traders, noisy_shock, aum, if_initial,
-                seed=int(rng.integers(0, 2**31)),
-            )
-            drawdowns.append(cascade["if_drawdown"])
-            exhaustions.append(int(cascade["if_exhausted"]))
-            clawbacks.append(cascade["clawback_required"])
-            final_shocks.append(cascade["final_price_shock"])
+        # Add stochastic noise to initial shock (±20% of base); impact draws for
+        # every step and simulation come from the same stream
+        initial_shocks = shock * rng.uniform(0.8, 1.2, size=n_simulations)
+        impact_noise   = rng.uniform(0, 0.5, size=(n_steps, n_simulations))
+
+        # All simulations of the scenario advance together, one array lane each
+        mc = _run_scenario_mc(traders, initial_shocks, impact_noise, total_oi, if_initial)
+        drawdowns    = mc["if_drawdown"]
+        exhaustions  = mc["if_exhausted"]
+        clawbacks    = mc["clawback_required"]
+        final_shocks = mc["final_price_shock"]
 
         results[scenario] = {
-            "if_drawdown_distribution": np.array(drawdowns),
+            "if_drawdown_distribution": drawdowns,
             "exhaustion_probability":   float(np.mean(exhaustions)),
             "expected_clawback":        float(np.mean(clawbacks)),
             "mean_if_drawdown":         float(np.mean(drawdowns)),
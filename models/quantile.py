@@ -0,0 +1,99 @@
+"""
+models/quantile.py — Selection-Based Quantiles
+===============================================
+Single-quantile lookups for the VaR and reserve models.
+
+np.percentile sorts the whole sample to read one order statistic. When only one
+quantile is needed, np.partition (introselect, O(N)) places the two bracketing
+order statistics and the result is interpolated exactly as np.percentile's
+default "linear" method does. When several quantiles of one sample are needed,
+sort it once and read them with sorted_percentile.
+"""
+
+import numpy as np
+
+
+def percentile(a: np.ndarray, q: float) -> float:
+    """
+    q-th percentile of `a` via partial selection.
+
+    Parameters
+    ----------
+    a : np.ndarray — 1-D sample
+    q : float — percentile in [0, 100]
+
+    Returns
+    -------
+    float — same value as np.percentile(a, q) (linear interpolation)
+    """
+    a = np.asarray(a).ravel()
+    pos = (q / 100.0) * (a.size - 1)
+    k = int(np.floor(pos))
+    frac = pos - k
+
+    if frac == 0.0 or k + 1 >= a.size:
+        return float(np.partition(a, k)[k])
+
+    part = np.partition(a, (k, k + 1))
+    lo, hi = float(part[k]), float(part[k + 1])
+    return lo + frac * (hi - lo)
+
+
+def lower_tail(a: np.ndarray, q: float) -> tuple:
+    """
+    q-th percentile of `a` and the mean of the sample at or below it.
+
+    One partition serves both: after selecting the bracketing order statistics
+    the lower tail is the contiguous front of the partitioned array, so no
+    boolean mask or gather is needed. (Values tied with the percentile beyond
+    the bracketing pair are not counted; for continuous samples there are none.)
+
+    Parameters
+    ----------
+    a : np.ndarray — 1-D sample
+    q : float — percentile in [0, 100]
+
+    Returns
+    -------
+    (percentile, tail_mean) : floats
+    """
+    a = np.asarray(a).ravel()
+    pos = (q / 100.0) * (a.size - 1)
+    k = int(np.floor(pos))
+    frac = pos - k
+
+    if k + 1 >= a.size:
+        part = np.partition(a, k)
+        value = float(part[k])
+        n_tail = k + 1
+    else:
+        part = np.partition(a, (k, k + 1))
+        lo, hi = float(part[k]), float(part[k + 1])
+        value = lo + frac * (hi - lo)
+        n_tail = k + 2 if hi <= value else k + 1
+
+    return value, float(part[:n_tail].mean(dtype=np.float64))
+
+
+def sorted_percentile(sorted_a: np.ndarray, q):
+    """
+    Percentile(s) of an already sorted 1-D sample, read in O(1) per quantile.
+
+    Parameters
+    ----------
+    sorted_a : np.ndarray — ascending 1-D sample
+    q        : float or array of floats — percentile(s) in [0, 100]
+
+    Returns
+    -------
+    float, or np.ndarray matching q — same values as np.percentile(sorted_a, q)
+    """
+    n   = sorted_a.size
+    pos = np.asarray(q, dtype=np.float64) / 100.0 * (n - 1)
+    lo  = np.floor(pos).astype(np.intp)
+    hi  = np.minimum(lo + 1, n - 1)
+    frac = pos - lo
+
+    lo_v = sorted_a[lo].astype(np.float64)
+    out  = lo_v + frac * (sorted_a[hi] - lo_v)
+    return float(out) if out.ndim == 0 else out
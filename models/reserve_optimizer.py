@@ -11,12 +11,16 @@ At mid-point costs (4.5% opp, 9% emergency): q* ≈ 0.667 (67th percentile).
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+from models.quantile import sorted_percentile
 
 
 def newsvendor_optimal_reserve(
@@ -45,11 +49,15 @@ def newsvendor_optimal_reserve(
     """
     critical_ratio = emergency_cost / (opportunity_cost + emergency_cost)
 
+    # Sorted once: quantiles are index lookups and tails are contiguous slices
+    sorted_w = np.sort(np.asarray(withdrawal_distribution, dtype=np.float64))
+    n = sorted_w.size
+
     # Newsvendor optimal
-    optimal_reserve = float(np.percentile(withdrawal_distribution, critical_ratio * 100))
+    optimal_reserve = sorted_percentile(sorted_w, critical_ratio * 100)
     # Conservative: CVaR 99%
-    var_99  = float(np.percentile(withdrawal_distribution, 99))
-    cvar_99 = float(withdrawal_distribution[withdrawal_distribution >= var_99].mean())
+    var_99  = sorted_percentile(sorted_w, 99)
+    cvar_99 = float(sorted_w[np.searchsorted(sorted_w, var_99, side="left"):].mean())
 
     # Annual costs (annualizing from weekend-horizon reserve)
     # Opportunity cost = reserve held (idle) * annual yield rate
@@ -57,7 +65,8 @@ def newsvendor_optimal_reserve(
     annual_cost_cvar    = cvar_99 * opportunity_cost
 
     # Cost if unhedged: expected shortfall * emergency funding rate
-    shortfall_optimal = np.mean(np.maximum(withdrawal_distribution - optimal_reserve, 0))
+    k = np.searchsorted(sorted_w, optimal_reserve, side="right")
+    shortfall_optimal = (sorted_w[k:].sum() - (n - k) * optimal_reserve) / n
     annual_cost_unhedged_optimal = shortfall_optimal * emergency_cost * 52  # ~52 weekends/year
 
     return {
@@ -92,26 +101,30 @@ def compute_cost_curve(
     -------
     pd.DataFrame with columns: reserve_level, opportunity_cost, shortfall_cost, total_cost
     """
-    max_reserve = float(np.percentile(withdrawal_distribution, 99.9))
-    reserve_levels = np.linspace(0, max_reserve, n_points)
-
-    rows = []
-    for R in reserve_levels:
-        # Opportunity cost: holding idle capital
-        opp_cost = R * opportunity_cost
+    sorted_w = np.sort(np.asarray(withdrawal_distribution, dtype=np.float64))
+    n = sorted_w.size
+    # prefix[k] = sum of the k smallest withdrawals
+    prefix = np.concatenate(([0.0], np.cumsum(sorted_w)))
 
-        # Shortfall cost: expected unmet withdrawals * emergency rate * frequency
-        shortfall = np.mean(np.maximum(withdrawal_distribution - R, 0))
-        shortage_cost = shortfall * emergency_cost * 52  # annualized over ~52 weekends
-
-        rows.append({
-            "reserve_level":    R,
-            "opportunity_cost": opp_cost,
-            "shortfall_cost":   shortage_cost,
-            "total_cost":       opp_cost + shortage_cost,
-        })
+    max_reserve = sorted_percentile(sorted_w, 99.9)
+    reserve_levels = np.linspace(0, max_reserve, n_points)
 
-    return pd.DataFrame(rows)
+    # Opportunity cost: holding idle capital
+    opp_cost = reserve_levels * opportunity_cost
+
+    # Shortfall cost: expected unmet withdrawals * emergency rate * frequency.
+    # Withdrawals above R are the sorted tail past k, so E[max(W - R, 0)] is
+    # (tail sum - tail count * R) / n
+    k = np.searchsorted(sorted_w, reserve_levels, side="right")
+    shortfall = ((prefix[-1] - prefix[k]) - (n - k) * reserve_levels) / n
+    shortage_cost = shortfall * emergency_cost * 52  # annualized over ~52 weekends
+
+    return pd.DataFrame({
+        "reserve_level":    reserve_levels,
+        "opportunity_cost": opp_cost,
+        "shortfall_cost":   shortage_cost,
+        "total_cost":       opp_cost + shortage_cost,
+    })
 
 
 def optimize_reserve(
@@ -23,8 +23,34 @@ import pandas as pd
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+
+
+def _asset_side(
+    total_aum_assets: float,
+    fiat_reserve: float,
+    prop_capital_ratio: float = cfg.PROP_CAPITAL_RATIO,
+) -> dict:
+    """
+    Asset side of the stressed balance sheet; no scenario changes it.
+
+    Returns
+    -------
+    dict with: fiat_reserve, insurance_fund, prop_capital, total_assets
+    """
+    insurance_fund_asset = total_aum_assets * cfg.INSURANCE_FUND_INITIAL
+    prop_capital_asset   = total_aum_assets * prop_capital_ratio
+    return {
+        "fiat_reserve":   fiat_reserve,
+        "insurance_fund": insurance_fund_asset,
+        "prop_capital":   prop_capital_asset,
+        "total_assets":   fiat_reserve + insurance_fund_asset + prop_capital_asset,
+    }
 
 
 def build_stressed_balance_sheet(
@@ -36,6 +62,7 @@ def build_stressed_balance_sheet(
     var_result: dict,
     if_result: dict,
     prop_capital_ratio: float = cfg.PROP_CAPITAL_RATIO,
+    assets: dict = None,
 ) -> dict:
     """
     Construct the stressed balance sheet for a single scenario.
@@ -50,16 +77,21 @@ def build_stressed_balance_sheet(
     var_result             : dict from historical_var.compute_var_suite()
     if_result              : dict for this scenario from simulate_insurance_fund()
     prop_capital_ratio     : float — proprietary capital as fraction of AUM
+    assets                 : dict from _asset_side(), shared across scenarios;
+                             computed from the arguments above when omitted
 
     Returns
     -------
-    dict with: assets, liabilities, net_position, solvency_verdict, capital_adequacy_ratio
+    dict with: assets, liabilities, net_position, solvent (bool), solvency_verdict,
+    capital_adequacy_ratio
     """
     # ---- ASSETS ----
-    fiat_reserve_asset   = fiat_reserve
-    insurance_fund_asset = total_aum_assets * cfg.INSURANCE_FUND_INITIAL
-    prop_capital_asset   = total_aum_assets * prop_capital_ratio
-    total_assets         = fiat_reserve_asset + insurance_fund_asset + prop_capital_asset
+    if assets is None:
+        assets = _asset_side(total_aum_assets, fiat_reserve, prop_capital_ratio)
+    fiat_reserve_asset   = assets["fiat_reserve"]
+    insurance_fund_asset = assets["insurance_fund"]
+    prop_capital_asset   = assets["prop_capital"]
+    total_assets         = assets["total_assets"]
 
     # ---- LIABILITIES ----
     # 1. Fiat withdrawal demand at p99
@@ -118,6 +150,7 @@ def build_stressed_balance_sheet(
         "net_position":           net_position,
         "capital_adequacy_ratio": car,
         "min_capital_required":   min_capital_required,
+        "solvent":                solvent,
         "solvency_verdict":       "SOLVENT ✓" if solvent else "INSOLVENT ✗",
         "capital_adequate":       adequate,
         # OJK Regulatory
@@ -154,6 +187,9 @@ def compute_solvency(
     fiat_reserve = total_fiat_liabilities * fiat_reserve_pct
     results      = {}
 
+    # The asset side is the same for every scenario, so it is computed once
+    assets = _asset_side(total_aum_assets, fiat_reserve)
+
     # Map withdrawal scenarios to IF scenarios
     scenario_if_map = {
         "normal": "normal",
@@ -174,6 +210,7 @@ def compute_solvency(
             withdrawal_p99         = withdrawal_p99,
             var_result             = var_result,
             if_result              = if_res,
+            assets                 = assets,
         )
         results[scenario] = sheet
 
@@ -190,6 +227,7 @@ def compute_solvency(
         withdrawal_p99         = luna_wd_p99,
         var_result             = var_result,
         if_result              = luna_if,
+        assets                 = assets,
     )
 
     return results
@@ -199,20 +237,21 @@ def solvency_summary_table(solvency_results: dict) -> pd.DataFrame:
     """
     Render the board-level solvency summary table.
     """
-    rows = []
-    for scenario, s in solvency_results.items():
-        rows.append({
-            "Scenario":             scenario.upper(),
-            "Total Assets (Rp B)":  f"Rp {s['total_assets']/1e9:.1f}B",
-            "Withdrawal Demand":    f"Rp {s['fiat_withdrawal_demand']/1e9:.1f}B",
-            "Deriv. Shortfall":     f"Rp {s['deriv_shortfall']/1e9:.2f}B",
-            "Market Risk":          f"Rp {s['market_risk_loss']/1e9:.1f}B",
-            "Total Liabilities":    f"Rp {s['total_liabilities']/1e9:.1f}B",
-            "Net Position (Rp B)":  f"Rp {s['net_position']/1e9:.1f}B",
-            "CAR":                  f"{s['capital_adequacy_ratio']:.2f}x",
-            "Verdict":              s["solvency_verdict"],
-        })
-    return pd.DataFrame(rows).set_index("Scenario")
+    sheets  = pd.DataFrame.from_dict(solvency_results, orient="index")
+    billion = "Rp {:.1f}B".format
+
+    table = pd.DataFrame({
+        "Total Assets (Rp B)":  (sheets["total_assets"] / 1e9).map(billion),
+        "Withdrawal Demand":    (sheets["fiat_withdrawal_demand"] / 1e9).map(billion),
+        "Deriv. Shortfall":     (sheets["deriv_shortfall"] / 1e9).map("Rp {:.2f}B".format),
+        "Market Risk":          (sheets["market_risk_loss"] / 1e9).map(billion),
+        "Total Liabilities":    (sheets["total_liabilities"] / 1e9).map(billion),
+        "Net Position (Rp B)":  (sheets["net_position"] / 1e9).map(billion),
+        "CAR":                  sheets["capital_adequacy_ratio"].map("{:.2f}x".format),
+        "Verdict":              sheets["solvency_verdict"],
+    })
+    table.index = pd.Index(sheets.index.str.upper(), name="Scenario")
+    return table
 
 
 def waterfall_data(solvency_results: dict) -> dict:
@@ -13,8 +13,15 @@ import pandas as pd
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+from models.quantile import percentile
+
+INDUSTRY_RESERVE_PCT = 0.10  # standard 10% rule of thumb
 
 
 def run_stress_test(
@@ -26,7 +33,7 @@ def run_stress_test(
 
     Parameters
     ----------
-    hourly_paths  : np.ndarray of shape (n_hours, n_simulations)
+    hourly_paths  : np.ndarray of shape (n_hours, n_simulations) — non-negative withdrawals
     reserve_level : float — available fiat reserve (USD)
 
     Returns
@@ -39,34 +46,75 @@ def run_stress_test(
         survive_rate      : float — 1 - failure_rate
         n_simulations     : int
     """
-    n_hours, n_sims = hourly_paths.shape
+    # Cumulative withdrawals per path (n_hours x n_sims), accumulated in float64
+    cumulative = hourly_paths.cumsum(axis=0, dtype=np.float64)
+    return _stress_tests_cumulative(cumulative, [reserve_level])[0]
+
 
-    # Cumulative withdrawals per path (n_hours x n_sims)
-    cumulative = hourly_paths.cumsum(axis=0)
+def _stress_tests_cumulative(cumulative: np.ndarray, reserve_levels: list) -> list:
+    """run_stress_test on precomputed cumulative withdrawals, for several reserve levels at once."""
+    n_hours, n_sims = cumulative.shape
 
-    # Breach: first hour cumulative > reserve
-    # Shape: (n_sims,) — -1 if no breach
-    tti_array = np.full(n_sims, -1, dtype=int)
+    first_breach = _first_breach_hour(cumulative, reserve_levels)
+    tti_arrays   = np.where(first_breach < n_hours, first_breach, -1).astype(np.int32)
 
-    for sim in range(n_sims):
-        breach_hours = np.where(cumulative[:, sim] > reserve_level)[0]
-        if len(breach_hours) > 0:
-            tti_array[sim] = breach_hours[0]
+    return [
+        _summarize_tti(tti_arrays[:, k], reserve_level)
+        for k, reserve_level in enumerate(reserve_levels)
+    ]
 
+
+def _first_breach_hour(cumulative: np.ndarray, reserve_levels: list) -> np.ndarray:
+    """
+    First hour at which each path's cumulative withdrawal exceeds each reserve.
+
+    Hourly withdrawals are non-negative, so every column of `cumulative` is
+    non-decreasing and the first breach is searchsorted(cumulative[:, j], R,
+    side="right"). NumPy has no column-wise searchsorted, so all paths and
+    reserves are bisected together: O(log n_hours) gathers per path instead of
+    comparing every hour.
+
+    Returns
+    -------
+    np.ndarray (n_sims, n_reserves) — breach hour, n_hours where never breached
+    """
+    n_hours, n_sims = cumulative.shape
+    reserves = np.asarray(reserve_levels, dtype=np.float64)
+    paths    = np.arange(n_sims)[:, None]
+
+    lo = np.zeros((n_sims, reserves.size), dtype=np.intp)
+    hi = np.full_like(lo, n_hours)
+    for _ in range(int(n_hours).bit_length()):
+        mid   = (lo + hi) >> 1
+        below = cumulative[np.minimum(mid, n_hours - 1), paths] <= reserves
+        open_ = lo < hi
+        lo = np.where(open_ & below, mid + 1, lo)
+        hi = np.where(open_ & ~below, mid, hi)
+    return lo
+
+
+def _summarize_tti(tti_array: np.ndarray, reserve_level: float) -> dict:
+    """Stress test result dict from per-path TTI hours (-1 = no breach)."""
     failed_mask  = tti_array >= 0
     failure_rate = float(failed_mask.mean())
 
     tti_distribution = tti_array[failed_mask].astype(float)
 
+    # All three TTI quartiles from a single percentile call
+    if len(tti_distribution) > 0:
+        tti_p25, tti_p50, tti_p75 = np.percentile(tti_distribution, [25, 50, 75]).tolist()
+    else:
+        tti_p25 = tti_p50 = tti_p75 = np.nan
+
     result = {
         "failure_rate":    failure_rate,
         "survive_rate":    1.0 - failure_rate,
         "tti_distribution": tti_distribution,
         "tti_mean":         float(tti_distribution.mean()) if len(tti_distribution) > 0 else np.nan,
-        "tti_p25":          float(np.percentile(tti_distribution, 25)) if len(tti_distribution) > 0 else np.nan,
-        "tti_p50":          float(np.percentile(tti_distribution, 50)) if len(tti_distribution) > 0 else np.nan,
-        "tti_p75":          float(np.percentile(tti_distribution, 75)) if len(tti_distribution) > 0 else np.nan,
-        "n_simulations":   n_sims,
+        "tti_p25":          tti_p25,
+        "tti_p50":          tti_p50,
+        "tti_p75":          tti_p75,
+        "n_simulations":   tti_array.size,
         "reserve_level":   reserve_level,
     }
     return result
@@ -76,6 +124,7 @@ def compute_safety_frontier(
     hourly_paths: np.ndarray,
     total_fiat: float,
     n_points: int = 50,
+    peak_withdrawals: np.ndarray = None,
 ) -> pd.DataFrame:
     """
     Compute the safety frontier: failure rate as a function of reserve level.
@@ -84,26 +133,33 @@ def compute_safety_frontier(
 
     Parameters
     ----------
-    hourly_paths : np.ndarray (n_hours, n_sims)
-    total_fiat   : float — AUM baseline (USD)
-    n_points     : int — number of reserve levels to evaluate
+    hourly_paths     : np.ndarray (n_hours, n_sims)
+    total_fiat       : float — AUM baseline (USD)
+    n_points         : int — number of reserve levels to evaluate
+    peak_withdrawals : np.ndarray (n_sims,), optional — per-path peak cumulative
+                       withdrawal, if already known. Paths are non-negative, so this
+                       is the path total (total_withdrawals from the Monte Carlo),
+                       and passing it skips the cumulative pass over hourly_paths
 
     Returns
     -------
     pd.DataFrame with columns: reserve_level, reserve_pct_aum, failure_rate
     """
     reserve_levels = np.linspace(0, total_fiat * 0.60, n_points)
-    rows = []
 
-    for R in reserve_levels:
-        test = run_stress_test(hourly_paths, R)
-        rows.append({
-            "reserve_level":    R,
-            "reserve_pct_aum":  R / total_fiat,
-            "failure_rate":     test["failure_rate"],
-        })
+    # A path fails at reserve R iff its peak cumulative withdrawal exceeds R, so
+    # one cumulative pass and a sort give the failure rate at every level
+    if peak_withdrawals is None:
+        peak_withdrawals = hourly_paths.cumsum(axis=0, dtype=np.float64).max(axis=0)
+    peak = np.sort(peak_withdrawals)
+    n_sims = peak.size
+    failure_rate = (n_sims - np.searchsorted(peak, reserve_levels, side="right")) / n_sims
 
-    return pd.DataFrame(rows)
+    return pd.DataFrame({
+        "reserve_level":    reserve_levels,
+        "reserve_pct_aum":  reserve_levels / total_fiat,
+        "failure_rate":     failure_rate,
+    })
 
 
 def run_all_stress_tests(
@@ -125,39 +181,94 @@ def run_all_stress_tests(
     -------
     dict: scenario → dict of stress test results per reserve level
     """
-    industry_baseline = total_fiat * 0.10  # standard 10% rule of thumb
+    industry_baseline = total_fiat * INDUSTRY_RESERVE_PCT
 
     output = {}
     for scenario, res in withdrawal_results.items():
-        hourly_paths = res["hourly_paths"]
+        # One cumulative pass and one breach broadcast per scenario cover all reserve levels
+        cumulative = res["hourly_paths"].cumsum(axis=0, dtype=np.float64)
 
-        nv_reserve   = float(np.percentile(res["total_withdrawals"], cfg.NEWSVENDOR_CRITICAL_RATIO * 100))
+        nv_reserve   = percentile(res["total_withdrawals"], cfg.NEWSVENDOR_CRITICAL_RATIO * 100)
         cvar_reserve = res["cvar_99"]
 
-        output[scenario] = {
-            "newsvendor":   run_stress_test(hourly_paths, nv_reserve),
-            "conservative": run_stress_test(hourly_paths, cvar_reserve),
-            "industry_10pct": run_stress_test(hourly_paths, industry_baseline),
+        levels = {
+            "newsvendor":     nv_reserve,
+            "conservative":   cvar_reserve,
+            "industry_10pct": industry_baseline,
         }
+        output[scenario] = dict(zip(levels, _stress_tests_cumulative(cumulative, list(levels.values()))))
 
     return output
 
 
+def summarize_paths(
+    hourly_paths: np.ndarray,
+    total_fiat: float,
+    n_points: int = 50,
+    total_withdrawals: np.ndarray = None,
+) -> dict:
+    """
+    Dashboard view of one scenario's paths with a single pass over hourly_paths.
+
+    Failure at any reserve level only depends on each path's peak cumulative
+    withdrawal, which for non-negative paths is its total; the industry-baseline
+    failure rate and the safety frontier both come from the totals. The one pass
+    over the (n_hours, n_sims) matrix is the mean hourly path.
+
+    Parameters
+    ----------
+    hourly_paths      : np.ndarray (n_hours, n_sims)
+    total_fiat        : float — AUM baseline (USD)
+    n_points          : int — reserve levels on the safety frontier
+    total_withdrawals : np.ndarray (n_sims,), optional — path totals, if already summed
+
+    Returns
+    -------
+    dict with keys:
+        industry_failure_rate : float — failure rate at the 10% AUM reserve
+                                (run_all_stress_tests' industry_10pct failure_rate)
+        frontier              : pd.DataFrame from compute_safety_frontier
+        mean_cumulative       : np.ndarray (n_hours,) — cumulative mean hourly withdrawal
+    """
+    if total_withdrawals is None:
+        total_withdrawals = hourly_paths.sum(axis=0, dtype=np.float64)
+
+    mean_cumulative = hourly_paths.mean(axis=1)
+    np.cumsum(mean_cumulative, out=mean_cumulative)
+
+    return {
+        "industry_failure_rate": float((total_withdrawals > total_fiat * INDUSTRY_RESERVE_PCT).mean()),
+        "frontier":              compute_safety_frontier(
+            hourly_paths, total_fiat, n_points, peak_withdrawals=total_withdrawals
+        ),
+        "mean_cumulative":       mean_cumulative,
+    }
+
+
 def stress_summary_table(stress_results: dict) -> pd.DataFrame:
     """
     Render a summary table of failure rates and TTI across scenarios and reserve levels.
     """
-    rows = []
-    for scenario, level_results in stress_results.items():
-        for level_name, res in level_results.items():
-            rows.append({
-                "Scenario":          scenario.capitalize(),
-                "Reserve Level":     level_name.replace("_", " ").title(),
-                "Failure Rate":      f"{res['failure_rate']:.1%}",
-                "TTI Median (hrs)":  f"{res['tti_p50']:.0f}" if not np.isnan(res['tti_p50']) else "—",
-                "TTI Mean (hrs)":    f"{res['tti_mean']:.0f}" if not np.isnan(res['tti_mean']) else "—",
-            })
-    return pd.DataFrame(rows).set_index(["Scenario", "Reserve Level"])
+    index = pd.MultiIndex.from_tuples(
+        [
+            (scenario.capitalize(), level_name.replace("_", " ").title())
+            for scenario, level_results in stress_results.items()
+            for level_name in level_results
+        ],
+        names=["Scenario", "Reserve Level"],
+    )
+    results = [res for level_results in stress_results.values() for res in level_results.values()]
+    metrics = pd.DataFrame(
+        {key: [res[key] for res in results] for key in ("failure_rate", "tti_p50", "tti_mean")},
+        index=index,
+    )
+
+    hours = "{:.0f}".format
+    return pd.DataFrame({
+        "Failure Rate":      metrics["failure_rate"].map("{:.1%}".format),
+        "TTI Median (hrs)":  metrics["tti_p50"].map(hours, na_action="ignore").fillna("—"),
+        "TTI Mean (hrs)":    metrics["tti_mean"].map(hours, na_action="ignore").fillna("—"),
+    })
 
 
 # ---------------------------------------------------------------------------
@@ -8,13 +8,26 @@ stress scenarios. Outputs simulated distributions, VaR, and CVaR.
 
 import numpy as np
 import pandas as pd
-from scipy import stats
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config as cfg
+try:
+    import config as cfg
+except ImportError:
+    # Run as a standalone script: put the project root on the path once
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config as cfg
+from data.cache import params_hash, is_up_to_date, write_npz, read_npz
 from data.generator import generate_retail_withdrawals, generate_institutional_withdrawals
+from models.quantile import sorted_percentile
+
+# config.py constants that determine the Monte Carlo draws (cache digest inputs)
+WITHDRAWAL_MC_CONFIG_KEYS = (
+    "FLOAT_DTYPE", "NORMAL_DAILY_RATE", "MILD_STRESS_RATE", "SEVERE_STRESS_RATE",
+    "INST_JUMP_RATE", "INST_JUMP_LOG_MU", "INST_JUMP_LOG_SIGMA",
+)
+
+_SCENARIOS = ("normal", "mild", "severe")
 
 
 def run_withdrawal_monte_carlo(
@@ -23,12 +36,14 @@ def run_withdrawal_monte_carlo(
     n_simulations: int = cfg.N_SIMULATIONS,
     n_hours: int = cfg.WEEKEND_HOURS,
     seed: int = cfg.RANDOM_SEED,
+    return_paths: bool = True,
 ) -> dict:
     """
     Run Monte Carlo simulation of total withdrawals over WEEKEND_HOURS.
 
     Each simulation path generates independent retail (Gamma) +
     institutional (Poisson + Log-normal) withdrawal series and sums them.
+    All paths are drawn at once, each component from its own spawned stream.
 
     Parameters
     ----------
@@ -36,40 +51,80 @@ def run_withdrawal_monte_carlo(
     scenario      : "normal" | "mild" | "severe"
     n_simulations : int — number of Monte Carlo paths
     n_hours       : int — simulation horizon
+    return_paths  : bool — keep the hourly paths; False when only totals and
+                    quantiles are needed (totals are then summed straight from
+                    the float64 draws and the path matrix is never built)
 
     Returns
     -------
     dict with keys:
         total_withdrawals   : np.ndarray (n_simulations,) — total over horizon
-        hourly_paths        : np.ndarray (n_hours, n_simulations) — hourly series
+        hourly_paths        : np.ndarray cfg.FLOAT_DTYPE (n_hours, n_simulations) — hourly series,
+                              None when return_paths is False
         var_99              : float — 99th percentile total withdrawal
         cvar_99             : float — CVaR (expected shortfall) at 99%
         percentiles         : dict — key quantiles {50, 75, 90, 95, 99, 99.9}
         scenario            : str
         total_fiat          : float
     """
-    rng_base = np.random.default_rng(seed)
+    total_withdrawals, hourly_paths = _simulate_paths(
+        total_fiat, scenario, n_simulations, n_hours, seed, return_paths
+    )
+    return _scenario_result(total_withdrawals, hourly_paths, scenario, total_fiat)
 
-    total_withdrawals = np.zeros(n_simulations)
-    hourly_paths      = np.zeros((n_hours, n_simulations))
 
-    for i in range(n_simulations):
-        sim_seed = int(rng_base.integers(0, 2**31))
+def _simulate_paths(
+    total_fiat: float,
+    scenario: str,
+    n_simulations: int,
+    n_hours: int,
+    seed: int,
+    return_paths: bool,
+    totals_out: np.ndarray = None,
+    paths_out: np.ndarray = None,
+) -> tuple:
+    """
+    Draw the Monte Carlo paths of one scenario: (total_withdrawals, hourly_paths).
+
+    totals_out / paths_out, when given, are filled in place (rows of the
+    stacked cross-scenario arrays built by run_all_scenarios).
+    """
+    retail_ss, inst_ss = np.random.SeedSequence(seed).spawn(2)
 
-        retail = generate_retail_withdrawals(total_fiat, scenario, n_hours, sim_seed)
-        inst   = generate_institutional_withdrawals(total_fiat, scenario, n_hours, sim_seed + 1)
+    retail = generate_retail_withdrawals(
+        total_fiat, scenario, n_hours, rng=np.random.default_rng(retail_ss), n_paths=n_simulations
+    )
+    inst = generate_institutional_withdrawals(
+        total_fiat, scenario, n_hours, rng=np.random.default_rng(inst_ss), n_paths=n_simulations
+    )
 
-        path = retail + inst
-        hourly_paths[:, i]  = path
-        total_withdrawals[i] = path.sum()
+    if return_paths:
+        # Paths are stored at working precision; per-path totals accumulate in float64
+        hourly_paths = np.add(retail, inst, dtype=cfg.FLOAT_DTYPE, out=paths_out)
+        total_withdrawals = hourly_paths.sum(axis=0, dtype=np.float64, out=totals_out)
+    else:
+        hourly_paths = None
+        total_withdrawals = retail.sum(axis=0, out=totals_out)
+        total_withdrawals += inst.sum(axis=0)
 
-    var_99  = float(np.percentile(total_withdrawals, 99))
-    cvar_99 = float(total_withdrawals[total_withdrawals >= var_99].mean())
+    return total_withdrawals, hourly_paths
 
-    percentiles = {
-        p: float(np.percentile(total_withdrawals, p))
-        for p in [50, 75, 90, 95, 99, 99.9]
-    }
+
+def _scenario_result(
+    total_withdrawals: np.ndarray,
+    hourly_paths: np.ndarray,
+    scenario: str,
+    total_fiat: float,
+) -> dict:
+    """Result dict of run_withdrawal_monte_carlo from the simulated paths."""
+    # One sort serves every quantile and the CVaR tail (a contiguous slice)
+    sorted_tw = np.sort(total_withdrawals)
+
+    quantile_levels = [50, 75, 90, 95, 99, 99.9]
+    percentiles = dict(zip(quantile_levels, sorted_percentile(sorted_tw, quantile_levels).tolist()))
+
+    var_99  = percentiles[99]
+    cvar_99 = float(sorted_tw[np.searchsorted(sorted_tw, var_99, side="left"):].mean())
 
     return {
         "total_withdrawals": total_withdrawals,
@@ -87,22 +142,146 @@ def run_all_scenarios(
     n_simulations: int = cfg.N_SIMULATIONS,
     n_hours: int = cfg.WEEKEND_HOURS,
     seed: int = cfg.RANDOM_SEED,
+    return_paths: bool = True,
+    return_stacked: bool = False,
 ) -> dict:
     """
     Run Monte Carlo for all three scenarios.
 
+    return_paths is passed through to run_withdrawal_monte_carlo; the stress
+    tests and safety frontier need the paths, summarize_results does not.
+
+    Every scenario's arrays are written into one stacked (structure-of-arrays)
+    buffer and each per-scenario dict holds row views of it. With
+    return_stacked=True that buffer is also returned, in the stack_results
+    layout, so cross-scenario operations need no copy.
+
     Returns
     -------
-    dict mapping scenario → result dict from run_withdrawal_monte_carlo
+    dict mapping scenario → result dict from run_withdrawal_monte_carlo, or
+    (that dict, stack_results-style dict) when return_stacked is True
     """
-    results = {}
-    for i, scenario in enumerate(["normal", "mild", "severe"]):
-        results[scenario] = run_withdrawal_monte_carlo(
-            total_fiat, scenario, n_simulations, n_hours, seed + i * 1000
+    total_withdrawals = np.empty((len(_SCENARIOS), n_simulations))
+    hourly_paths = (
+        np.empty((len(_SCENARIOS), n_hours, n_simulations), dtype=cfg.FLOAT_DTYPE)
+        if return_paths else None
+    )
+
+    for i, scenario in enumerate(_SCENARIOS):
+        _simulate_paths(
+            total_fiat, scenario, n_simulations, n_hours, seed + i * 1000, return_paths,
+            totals_out=total_withdrawals[i],
+            paths_out=hourly_paths[i] if return_paths else None,
         )
+    results = _results_from_stacked(total_withdrawals, hourly_paths, total_fiat)
+    if return_stacked:
+        return results, _stacked_layout(results, total_withdrawals, hourly_paths)
     return results
 
 
+def _results_from_stacked(
+    total_withdrawals: np.ndarray,
+    hourly_paths: np.ndarray,
+    total_fiat: float,
+) -> dict:
+    """scenario → result dict, each holding row views of the stacked arrays."""
+    return {
+        scenario: _scenario_result(
+            total_withdrawals[i], None if hourly_paths is None else hourly_paths[i], scenario, total_fiat
+        )
+        for i, scenario in enumerate(_SCENARIOS)
+    }
+
+
+def _stacked_layout(
+    results: dict,
+    total_withdrawals: np.ndarray,
+    hourly_paths: np.ndarray,
+) -> dict:
+    """stack_results dict for `results`, given its arrays already stacked in scenario order."""
+    scenarios = tuple(results)
+    quantile_levels = tuple(results[scenarios[0]]["percentiles"])
+    return {
+        "scenarios":         scenarios,
+        "total_withdrawals": total_withdrawals,
+        "hourly_paths":      hourly_paths,
+        "quantile_levels":   quantile_levels,
+        "percentiles":       np.array([[results[sc]["percentiles"][q] for q in quantile_levels] for sc in scenarios]),
+        "var_99":            np.array([results[sc]["var_99"] for sc in scenarios]),
+        "cvar_99":           np.array([results[sc]["cvar_99"] for sc in scenarios]),
+    }
+
+
+def stack_results(results: dict) -> dict:
+    """
+    Structure-of-arrays copy of run_all_scenarios output, for cross-scenario operations.
+
+    The per-scenario arrays are stacked (copied). run_all_scenarios(return_stacked=True)
+    returns the same layout over its own buffers without copying.
+
+    Parameters
+    ----------
+    results : dict from run_all_scenarios()
+
+    Returns
+    -------
+    dict with keys:
+        scenarios         : tuple of str — row order of the arrays below
+        total_withdrawals : np.ndarray (n_scenarios, n_simulations)
+        hourly_paths      : np.ndarray (n_scenarios, n_hours, n_simulations), or None
+        quantile_levels   : tuple — columns of `percentiles`
+        percentiles       : np.ndarray (n_scenarios, n_quantiles)
+        var_99, cvar_99   : np.ndarray (n_scenarios,)
+    """
+    rows = list(results.values())
+    hourly_paths = None
+    if rows[0]["hourly_paths"] is not None:
+        hourly_paths = np.stack([res["hourly_paths"] for res in rows])
+    return _stacked_layout(results, np.stack([res["total_withdrawals"] for res in rows]), hourly_paths)
+
+
+def run_all_scenarios_cached(
+    total_fiat: float,
+    n_simulations: int = cfg.N_SIMULATIONS,
+    n_hours: int = cfg.WEEKEND_HOURS,
+    seed: int = cfg.RANDOM_SEED,
+    path: str = cfg.WITHDRAWAL_NPZ_PATH,
+    return_stacked: bool = False,
+) -> dict:
+    """
+    run_all_scenarios, persisted to `path` and reloaded while its inputs are unchanged.
+
+    The draws are deterministic in (seed, n_simulations, n_hours, total_fiat) and
+    WITHDRAWAL_MC_CONFIG_KEYS, so the stacked paths and totals are stored with a
+    digest of those inputs; quantiles and CVaR are recomputed from them on load.
+
+    The digest is salted with data.cache._SCHEMA_VERSION; bump it when a change to
+    _simulate_paths (seeding, draw order, batching) alters the paths. The cache
+    lives under data/raw (cfg.WITHDRAWAL_NPZ_PATH); without a version bump, a
+    stale file must be deleted by hand there.
+
+    Returns
+    -------
+    as run_all_scenarios, including the (results, stacked) pair for return_stacked
+    """
+    digest = params_hash(
+        WITHDRAWAL_MC_CONFIG_KEYS,
+        total_fiat=float(total_fiat), n_simulations=n_simulations, n_hours=n_hours, seed=seed,
+        scenarios=_SCENARIOS,
+    )
+    if is_up_to_date(path, digest):
+        arrays  = read_npz(path)
+        results = _results_from_stacked(arrays["total_withdrawals"], arrays["hourly_paths"], total_fiat)
+        soa     = _stacked_layout(results, arrays["total_withdrawals"], arrays["hourly_paths"])
+    else:
+        results, soa = run_all_scenarios(total_fiat, n_simulations, n_hours, seed, return_stacked=True)
+        write_npz(
+            {"total_withdrawals": soa["total_withdrawals"], "hourly_paths": soa["hourly_paths"]},
+            path, digest,
+        )
+    return (results, soa) if return_stacked else results
+
+
 def summarize_results(results: dict, total_fiat: float) -> pd.DataFrame:
     """
     Build a summary table comparing scenarios across key risk metrics.
@@ -134,7 +313,7 @@ if __name__ == "__main__":
     AUM = cfg.EXCHANGE_AUM
     print(f"Running Monte Carlo withdrawal forecasting on Rp {AUM/1e12:.1f}T AUM...")
 
-    results = run_all_scenarios(AUM, n_simulations=1000)  # fast smoke test
+    results = run_all_scenarios(AUM, n_simulations=1000, return_paths=False)  # fast smoke test
 
     summary = summarize_results(results, AUM)
     print("\n", summary.to_string())
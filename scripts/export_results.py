@@ -7,8 +7,8 @@ Generates dashboard/data.js with a hardcoded constant object.
 
 import os
 import sys
-import json
 import numpy as np
+import orjson
 import pandas as pd
 
 # Add project root to path for imports
@@ -16,41 +16,66 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config as cfg
 from data.generator import generate_weekend_withdrawals, compute_gini
-from models.withdrawal_forecast import run_all_scenarios
+from models.withdrawal_forecast import run_all_scenarios_cached
 from models.reserve_optimizer import optimize_reserve, newsvendor_optimal_reserve
-from models.stress_test import run_all_stress_tests, compute_safety_frontier
+from models.stress_test import summarize_paths
 from models.historical_var import compute_var_suite
 from models.insurance_fund import simulate_insurance_fund
 from models.solvency import compute_solvency
+from data.cache import cached_column_sum
 
-def serialize_results(obj):
-    """Recursively convert numpy types to Python types for JSON serialization."""
-    if isinstance(obj, dict):
-        return {k: serialize_results(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [serialize_results(v) for v in obj]
-    elif isinstance(obj, (np.int64, np.int32, np.int16, np.int8)):
-        return int(obj)
-    elif isinstance(obj, (np.float64, np.float32, np.float16)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return serialize_results(obj.tolist())
-    else:
-        return obj
+# Columns run_export reads from the persisted market dataset, with their dtypes
+_MARKET_COLUMNS = {"btc_return": np.float64}
+
+
+def load_persisted(path: str, columns: dict) -> pd.DataFrame:
+    """Read only `columns` (name → dtype) of a persisted CSV, skipping type inference."""
+    return pd.read_csv(path, usecols=list(columns), dtype=columns)
+
+def _density_histograms(samples: np.ndarray, bins: int) -> tuple:
+    """
+    np.histogram(row, bins, density=True) for every row of `samples` at once.
+
+    Each row keeps its own min–max range. Bin indices for all rows come from one
+    vectorized pass (with np.histogram's ±1 ULP edge correction) and are counted
+    with a single offset bincount.
+
+    Returns
+    -------
+    (densities (n_rows, bins), bin_edges (n_rows, bins + 1))
+    """
+    n_rows = samples.shape[0]
+    first = samples.min(axis=1)
+    last  = samples.max(axis=1)
+    # np.histogram widens a degenerate range by ±0.5
+    flat  = first == last
+    first = np.where(flat, first - 0.5, first)
+    last  = np.where(flat, last + 0.5, last)
+    edges = np.ascontiguousarray(np.linspace(first, last, bins + 1, axis=1))
+
+    rows = np.arange(n_rows)[:, None]
+    idx  = ((samples - first[:, None]) / (last - first)[:, None] * bins).astype(np.intp)
+    idx[idx == bins] -= 1
+    idx -= samples < edges[rows, idx]
+    idx += (samples >= edges[rows, idx + 1]) & (idx != bins - 1)
+
+    counts = np.bincount((idx + rows * bins).ravel(), minlength=n_rows * bins).reshape(n_rows, bins)
+    return counts / np.diff(edges, axis=1) / counts.sum(axis=1, keepdims=True), edges
 
 def run_export():
     print("Exporting model results for dashboard...")
     
     # 1. Load data from persistence
     print("  Loading persisted data...")
-    users = pd.read_csv(cfg.USERS_CSV_PATH)
-    market_df = pd.read_csv(cfg.MARKET_CSV_PATH)
-    total_fiat = users['fiat_balance'].sum()  # Fiat liabilities (~$2.23B)
+    market_df = load_persisted(cfg.MARKET_CSV_PATH, _MARKET_COLUMNS)
+    # Only the users total is needed; it is re-read only when the CSV changes
+    total_fiat = cached_column_sum(cfg.USERS_CSV_PATH, 'fiat_balance')  # Fiat liabilities (~$2.23B)
     total_assets = cfg.TOTAL_ASSETS_AUM       # Total AUM assets (~$2.9B)
     
     # 2. Run analysis
     print(f"  Running withdrawal Monte Carlo (10,000 paths) on Rp {total_fiat/1e9:.2f}B liabilities...")
-    wd = run_all_scenarios(total_fiat, n_simulations=cfg.N_SIMULATIONS)
+    # Per-scenario results plus the stacked cross-scenario arrays they are views of
+    wd, soa = run_all_scenarios_cached(total_fiat, n_simulations=cfg.N_SIMULATIONS, return_stacked=True)
     
     print("  Running VaR suite...")
     var_result = compute_var_suite(market_df, total_fiat)
@@ -65,26 +90,73 @@ def run_export():
         total_aum_assets=total_assets
     )
     
-    print("  Running safety frontier analysis...")
-    safety_frontiers = {}
-    for sc in ['normal', 'mild', 'severe']:
-        safety_frontiers[sc] = compute_safety_frontier(wd[sc]['hourly_paths'], total_fiat, n_points=50)
-
     # 3. Aggregate into DASHBOARD_BRIEF schema
     print("  Aggregating results...")
     
-    # Run stress tests to get failure probabilities
-    stress_results = run_all_stress_tests(wd, total_fiat)
+    # One pass per scenario: every dashboard block derived from its Monte Carlo
+    # paths is built while those arrays are being read
+    print("  Running safety frontier analysis...")
+    # Withdrawal distribution histograms of all scenarios in one sweep of the stacked totals
+    hists, bin_edges = _density_histograms(soa["total_withdrawals"], bins=50)
 
-    # Generate some histogram data for withdrawal distribution chart
+    scenario_cards        = {}
     withdrawal_histograms = {}
-    for sc in ['normal', 'mild', 'severe']:
-        hist, bin_edges = np.histogram(wd[sc]['total_withdrawals'], bins=50, density=True)
+    hourly_paths          = {}
+    safety_frontiers      = {}
+    for i, sc in enumerate(soa['scenarios']):
+        res = wd[sc]
+        pct = res['percentiles']
+        # Failure probability, safety frontier and mean path from one pass over the paths
+        summary = summarize_paths(
+            res['hourly_paths'], total_fiat, n_points=50, total_withdrawals=res['total_withdrawals']
+        )
+
+        scenario_cards[sc] = {
+            'name': sc.capitalize(),
+            'failureProb': summary['industry_failure_rate'],
+            'verdict': "SOLVENT" if solvency_results[sc]['solvent'] else "INSOLVENT",
+            'mean': float(pct[50]),
+            'p95': float(pct[95]),
+            'p99': float(pct[99]),
+            'cvar99': float(res['cvar_99']),
+        }
+
+        # Histogram data for withdrawal distribution chart
         withdrawal_histograms[sc] = {
-            'hist': serialize_results(hist),
-            'bins': serialize_results(bin_edges)
+            'hist': hists[i],
+            'bins': bin_edges[i]
+        }
+
+        hourly_paths[sc] = summary['mean_cumulative']
+
+        frontier = summary['frontier']
+        safety_frontiers[sc] = {
+            'x': frontier['reserve_pct_aum'].to_numpy(),
+            'y': frontier['failure_rate'].to_numpy()
         }
 
+    solvency_blocks = {}
+    for sc in ['normal', 'mild', 'severe', 'luna']:
+        sheet = solvency_results[sc]
+        solvency_blocks[sc] = {
+            'liabilities': {
+                'withdrawal': float(sheet['fiat_withdrawal_demand']),
+                'derivatives': float(sheet['deriv_shortfall']),
+                'marketRisk': float(sheet['market_risk_loss'])
+            },
+            'assets': {
+                'fiatReserve': float(sheet['fiat_reserve']),
+                'insuranceFund': float(sheet['insurance_fund']),
+                'propCapital': float(sheet['prop_capital'])
+            },
+            'shortfall': float(abs(sheet['net_position'] if sheet['net_position'] < 0 else 0))
+        }
+
+    # Severe-scenario reserve tiers above the VaR-based Tier 1
+    severe_pct = wd['severe']['percentiles']
+    tier2 = max(severe_pct[95] - var_result['tier1_reserve'], 0)
+    tier3 = max(wd['severe']['cvar_99'] - severe_pct[95], 0)
+
     dashboard_data = {
         'overview': {
             'totalFiat': float(total_fiat),
@@ -97,36 +169,10 @@ def run_export():
                 'crisis': 2.3
             }
         },
-        'scenarios': {
-            sc: {
-                'name': sc.capitalize(),
-                'failureProb': float(stress_results[sc]['industry_10pct']['failure_rate']),
-                'verdict': "SOLVENT" if "✓" in solvency_results[sc]['solvency_verdict'] else "INSOLVENT",
-                'mean': float(wd[sc]['percentiles'][50]),
-                'p95': float(wd[sc]['percentiles'][95]),
-                'p99': float(wd[sc]['percentiles'][99]),
-                'cvar99': float(wd[sc]['cvar_99']),
-            } for sc in ['normal', 'mild', 'severe']
-        },
+        'scenarios': scenario_cards,
         'withdrawalHistograms': withdrawal_histograms,
-        'hourlyPaths': {
-            sc: (wd[sc]['hourly_paths'].mean(axis=1).cumsum()).tolist() for sc in ['normal', 'mild', 'severe']
-        },
-        'solvency': {
-            sc: {
-                'liabilities': {
-                    'withdrawal': float(solvency_results[sc]['fiat_withdrawal_demand']),
-                    'derivatives': float(solvency_results[sc]['deriv_shortfall']),
-                    'marketRisk': float(solvency_results[sc]['market_risk_loss'])
-                },
-                'assets': {
-                    'fiatReserve': float(solvency_results[sc]['fiat_reserve']),
-                    'insuranceFund': float(solvency_results[sc]['insurance_fund']),
-                    'propCapital': float(solvency_results[sc]['prop_capital'])
-                },
-                'shortfall': float(abs(solvency_results[sc]['net_position'] if solvency_results[sc]['net_position'] < 0 else 0))
-            } for sc in ['normal', 'mild', 'severe', 'luna']
-        },
+        'hourlyPaths': hourly_paths,
+        'solvency': solvency_blocks,
         'varComparison': {
             'hs': {
                 'p95': float(var_result['hs_var_95_usd']),
@@ -149,19 +195,14 @@ def run_export():
             },
             'ewma_ess': int(var_result['ewma_ess_days'])
         },
-        'safetyFrontier': {
-            sc: {
-                'x': safety_frontiers[sc]['reserve_pct_aum'].tolist(),
-                'y': safety_frontiers[sc]['failure_rate'].tolist()
-            } for sc in ['normal', 'mild', 'severe']
-        },
-        'ifDrawdown': serialize_results(if_results['severe']['if_drawdown_distribution'][:500]),
+        'safetyFrontier': safety_frontiers,
+        'ifDrawdown': if_results['severe']['if_drawdown_distribution'][:500],
         'reservePolicy': {
             'tier1': float(var_result['tier1_reserve']),
-            'tier2': float(max(wd['severe']['percentiles'][95] - var_result['tier1_reserve'], 0)),
-            'tier3': float(max(wd['severe']['cvar_99'] - wd['severe']['percentiles'][95], 0)),
+            'tier2': float(tier2),
+            'tier3': float(tier3),
             'annualCostTier1': float(var_result['tier1_reserve'] * cfg.YIELD_MID),
-            'annualCostTier2': float(max(wd['severe']['percentiles'][95] - var_result['tier1_reserve'], 0) * cfg.YIELD_MID)
+            'annualCostTier2': float(tier2 * cfg.YIELD_MID)
         }
     }
 
@@ -291,11 +332,18 @@ def run_export():
     temp_path = output_path + ".tmp"
     
     try:
-        with open(temp_path, "w") as f:
-            f.write("// Liquidity Sentinel — Auto-generated Risk Model Results\n")
-            f.write("const DATA = ")
-            f.write(json.dumps(dashboard_data, indent=2))
-            f.write(";\n")
+        # orjson serializes ndarrays and numpy scalars natively, no .tolist() needed.
+        # Compact output: data.js is read by the browser, not by people
+        payload = (
+            "// Liquidity Sentinel — Auto-generated Risk Model Results\nconst DATA = ".encode()
+            + orjson.dumps(dashboard_data, option=orjson.OPT_SERIALIZE_NUMPY)
+            + b";\n"
+        )
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+            # Make the contents durable before the rename publishes them
+            f.flush()
+            os.fsync(f.fileno())
         
         # Atomic rename to overwrite data.js
         os.replace(temp_path, output_path)
@@ -5,6 +5,9 @@ Generates and persists synthetic data to disk for easier inspection.
 Creates data/raw/ directory and saves:
   - synthetic_users_scaled.csv  : 100K-user base with fiat balances
   - market_history_365d.csv      : 365-day regime-switching market data
+
+Each file has a .hash sidecar; files whose generating inputs are unchanged
+are not rewritten.
 """
 
 import os
@@ -15,8 +18,9 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config as cfg
-from data.generator import generate_user_base
-from data.market_data import generate_market_data
+from data.generator import generate_user_base, USER_BASE_CONFIG_KEYS
+from data.market_data import generate_market_data, MARKET_DATA_CONFIG_KEYS
+from data.cache import params_hash, is_up_to_date, write_csv
 
 def run_init():
     """Generate and save data."""
@@ -27,19 +31,32 @@ def run_init():
     os.makedirs(raw_dir, exist_ok=True)
     print(f"  Target directory: {raw_dir}")
 
-    # 1. Generate and save user base
-    print("  Generating user base (100K users)...")
-    users = generate_user_base(target_aum=cfg.FIAT_LIABILITIES_TARGET)
+    # 1. Generate and save user base (skipped if inputs are unchanged)
     users_path = os.path.join(raw_dir, "synthetic_users_scaled.csv")
-    users.to_csv(users_path, index=False)
-    print(f"  Saved: {users_path}")
+    users_digest = params_hash(
+        USER_BASE_CONFIG_KEYS, seed=cfg.RANDOM_SEED, target_aum=cfg.FIAT_LIABILITIES_TARGET
+    )
+    if is_up_to_date(users_path, users_digest):
+        print(f"  Up to date: {users_path}")
+    else:
+        print("  Generating user base (100K users)...")
+        users = generate_user_base(target_aum=cfg.FIAT_LIABILITIES_TARGET)
+        write_csv(users, users_path, users_digest)
+        print(f"  Saved: {users_path}")
 
-    # 2. Generate and save market data
-    print("  Generating market history (365 days)...")
-    market_df = generate_market_data(n_days=cfg.N_DAYS_HISTORY)
+    # 2. Generate and save market data (skipped if inputs are unchanged)
     market_path = os.path.join(raw_dir, "market_history_365d.csv")
-    market_df.to_csv(market_path, index=False)
-    print(f"  Saved: {market_path}")
+    market_digest = params_hash(
+        MARKET_DATA_CONFIG_KEYS,
+        n_days=cfg.N_DAYS_HISTORY, seed=cfg.RANDOM_SEED, use_business_dates=True,
+    )
+    if is_up_to_date(market_path, market_digest):
+        print(f"  Up to date: {market_path}")
+    else:
+        print("  Generating market history (365 days)...")
+        market_df = generate_market_data(n_days=cfg.N_DAYS_HISTORY, use_business_dates=True)
+        write_csv(market_df, market_path, market_digest)
+        print(f"  Saved: {market_path}")
 
     print("\nData initialization complete. All raw files persisted.")
     print("Ready for inspection or further analysis.")